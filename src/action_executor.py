@@ -1,23 +1,209 @@
 """
-Action executor module for performing UI actions using pyautogui.
+Action executor module for performing UI actions using Win32 SendInput.
 This module takes action plans from the AI planner and executes them
-on the Windows desktop using pyautogui automation.
+on the Windows desktop by injecting mouse and keyboard events directly
+through user32.SendInput via ctypes.
+Unlike pyautogui there is no fail-safe (moving the mouse to a screen corner
+does not abort); stop the agent with Ctrl+C instead. The spoken "yes"
+confirmation below is the intended safety mechanism.
 TODO: In the future we will add a safety gate that asks for a spoken "yes"
 before executing high-risk actions like deleting files, modifying system settings,
 or performing actions that could cause data loss.
 """
 
 import time
-import pyautogui
-from typing import Dict
+import ctypes
+import logging
+from ctypes import wintypes
+from typing import Dict, List
 
-# Set a small pause between pyautogui actions
-pyautogui.PAUSE = 0.15
+log = logging.getLogger(__name__)
+
+user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+# Win32 input constants (winuser.h)
+INPUT_MOUSE = 0
+INPUT_KEYBOARD = 1
+
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_ABSOLUTE = 0x8000
+
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+
+SM_CXSCREEN = 0
+SM_CYSCREEN = 1
+
+PROCESS_PER_MONITOR_DPI_AWARE = 2
+
+VK_RETURN = 0x0D
+VK_LWIN = 0x5B
+
+# Supported key names mapped to virtual-key codes
+KEY_CODES = {
+    "win": VK_LWIN,
+    "enter": VK_RETURN,
+}
+
+# Delay between sequence steps for the UI to react (seconds)
+INTER_STEP_DELAY = 0.0
+
+# Step types that can be coalesced into a single SendInput batch
+KEYBOARD_ACTIONS = ("key", "type_text")
+
+# Keys that open a shell UI (the Start menu), which appears asynchronously:
+# input sent right after them may land in the previously focused window, so
+# they are never batched and are followed by a settle delay (seconds)
+SHELL_KEYS = (VK_LWIN,)
+SHELL_SETTLE_DELAY = 0.3
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", wintypes.WORD),
+        ("wScan", wintypes.WORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [
+        ("uMsg", wintypes.DWORD),
+        ("wParamL", wintypes.WORD),
+        ("wParamH", wintypes.WORD),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [
+        ("mi", MOUSEINPUT),
+        ("ki", KEYBDINPUT),
+        ("hi", HARDWAREINPUT),
+    ]
+
+
+class INPUT(ctypes.Structure):
+    _anonymous_ = ("u",)
+    _fields_ = [
+        ("type", wintypes.DWORD),
+        ("u", _INPUTUNION),
+    ]
+
+
+user32.SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+user32.SendInput.restype = wintypes.UINT
+
+# Opt in to DPI awareness before reading screen metrics (pyautogui did this on
+# import). mss makes the process per-monitor DPI aware on its first capture,
+# so screenshots and model coordinates are physical pixels; the screen size
+# used to normalize clicks must be physical too, not the scaled logical size.
+try:
+    ctypes.WinDLL('shcore').SetProcessDpiAwareness(PROCESS_PER_MONITOR_DPI_AWARE)
+except (OSError, AttributeError):
+    # shcore is only available on Windows 8.1+
+    user32.SetProcessDPIAware()
+
+# Primary screen size, queried once at import instead of before every click
+SCREEN_WIDTH = user32.GetSystemMetrics(SM_CXSCREEN)
+SCREEN_HEIGHT = user32.GetSystemMetrics(SM_CYSCREEN)
+
+
+def _send_inputs(inputs: List[INPUT]) -> None:
+    """
+    Deliver a list of INPUT events to the system in a single SendInput call.
+    
+    Args:
+        inputs: INPUT structures to inject, in order
+    """
+    if not inputs:
+        return
+    
+    array = (INPUT * len(inputs))(*inputs)
+    sent = user32.SendInput(len(inputs), array, ctypes.sizeof(INPUT))
+    if sent != len(inputs):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+
+def _click_inputs(x: int, y: int) -> List[INPUT]:
+    """
+    Build the move + left-button down/up events for a click at (x, y).
+    
+    Args:
+        x: Screen x coordinate in pixels
+        y: Screen y coordinate in pixels
+        
+    Returns:
+        List[INPUT]: Mouse events for the click
+    """
+    # Absolute mouse coordinates are normalized to 0..65535
+    dx = round(x * 65535 / max(SCREEN_WIDTH - 1, 1))
+    dy = round(y * 65535 / max(SCREEN_HEIGHT - 1, 1))
+    
+    move = INPUT(type=INPUT_MOUSE)
+    move.mi = MOUSEINPUT(dx=dx, dy=dy, dwFlags=MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE)
+    down = INPUT(type=INPUT_MOUSE)
+    down.mi = MOUSEINPUT(dwFlags=MOUSEEVENTF_LEFTDOWN)
+    up = INPUT(type=INPUT_MOUSE)
+    up.mi = MOUSEINPUT(dwFlags=MOUSEEVENTF_LEFTUP)
+    return [move, down, up]
+
+
+def _text_inputs(text: str) -> List[INPUT]:
+    """
+    Build unicode key down/up events that type the given text.
+    
+    Args:
+        text: Text to type
+        
+    Returns:
+        List[INPUT]: Keyboard events for every UTF-16 code unit of the text
+    """
+    inputs = []
+    units = text.encode("utf-16-le")
+    for i in range(0, len(units), 2):
+        code_unit = units[i] | (units[i + 1] << 8)
+        for flags in (KEYEVENTF_UNICODE, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP):
+            event = INPUT(type=INPUT_KEYBOARD)
+            event.ki = KEYBDINPUT(wScan=code_unit, dwFlags=flags)
+            inputs.append(event)
+    return inputs
+
+
+def _key_inputs(vk: int) -> List[INPUT]:
+    """
+    Build the key down/up events for a single virtual key press.
+    
+    Args:
+        vk: Virtual-key code
+        
+    Returns:
+        List[INPUT]: Keyboard events for the key press
+    """
+    down = INPUT(type=INPUT_KEYBOARD)
+    down.ki = KEYBDINPUT(wVk=vk)
+    up = INPUT(type=INPUT_KEYBOARD)
+    up.ki = KEYBDINPUT(wVk=vk, dwFlags=KEYEVENTF_KEYUP)
+    return [down, up]
 
 
 def execute_single_action(action: Dict) -> None:
     """
-    Execute a single UI action using pyautogui.
+    Execute a single UI action using SendInput.
     
     Args:
         action: Dictionary containing action_type and relevant parameters
@@ -28,42 +214,97 @@ def execute_single_action(action: Dict) -> None:
         if action_type == "click":
             x = action.get("x", 0)
             y = action.get("y", 0)
-            print(f"[exec] click at ({x},{y})")
+            log.info("[exec] click at (%s,%s)", x, y)
             
-            # Move mouse to position with smooth animation
-            pyautogui.moveTo(x, y, duration=0.2)
-            # Left click
-            pyautogui.click()
+            # Move mouse and left click in one SendInput call
+            _send_inputs(_click_inputs(x, y))
             
         elif action_type == "type_text":
             text = action.get("text", "")
-            print(f"[exec] type_text: {text}")
+            log.info("[exec] type_text: %s", text)
             
-            # Type text with small interval between characters
-            pyautogui.typewrite(text, interval=0.02)
+            # Type all characters in one SendInput call
+            _send_inputs(_text_inputs(text))
             
         elif action_type == "key":
             key = action.get("key", "")
-            print(f"[exec] press key: {key}")
+            log.info("[exec] press key: %s", key)
             
-            if key == "win":
-                # Press Windows key
-                pyautogui.hotkey("win")
-            elif key == "enter":
-                # Press Enter key
-                pyautogui.press("enter")
+            vk = KEY_CODES.get(key)
+            if vk is not None:
+                # Press and release the key
+                _send_inputs(_key_inputs(vk))
+                if vk in SHELL_KEYS:
+                    # Give the shell UI time to open and take focus
+                    time.sleep(SHELL_SETTLE_DELAY)
             else:
                 # TODO: Add support for more keys (ctrl, alt, shift, etc.)
-                print(f"[exec] unsupported key: {key}")
+                log.warning("[exec] unsupported key: %s", key)
                 
         elif action_type == "none":
-            print("[exec] no-op")
+            log.info("[exec] no-op")
             
         else:
-            print(f"[exec] unknown action type: {action_type}")
+            log.warning("[exec] unknown action type: %s", action_type)
             
     except Exception as e:
-        print(f"[exec] ERROR: {e}")
+        log.error("[exec] ERROR: %s", e)
+
+
+def execute_batched(steps: List[Dict]) -> None:
+    """
+    Execute sequence steps with as few SendInput calls as possible.
+    
+    Consecutive keyboard steps that go to the same, already-focused target
+    are accumulated into one INPUT array so they are delivered back-to-back.
+    Clicks and shell keys (Win) flush the pending batch and run on their own
+    so the UI can settle; once a shell UI is open, typed text is also flushed
+    and given time to update (e.g. search results) before the next key press.
+    
+    Args:
+        steps: List of single action dictionaries
+    """
+    pending: List[INPUT] = []
+    shell_open = False
+    
+    for i, step in enumerate(steps):
+        action_type = step.get("action_type", "none")
+        
+        if action_type == "type_text":
+            text = step.get("text", "")
+            log.info("[exec] type_text: %s", text)
+            pending.extend(_text_inputs(text))
+            
+        elif action_type == "key" and KEY_CODES.get(step.get("key", "")) not in SHELL_KEYS:
+            key = step.get("key", "")
+            log.info("[exec] press key: %s", key)
+            
+            vk = KEY_CODES.get(key)
+            if vk is None:
+                log.warning("[exec] unsupported key: %s", key)
+                continue
+            
+            if shell_open and pending:
+                # Let the shell UI react to the text typed into it first
+                _send_inputs(pending)
+                pending = []
+                time.sleep(SHELL_SETTLE_DELAY)
+            pending.extend(_key_inputs(vk))
+                
+        else:
+            # Flush point: send everything queued so far, then run the step
+            # (shell keys settle inside execute_single_action)
+            _send_inputs(pending)
+            pending = []
+            execute_single_action(step)
+            shell_open = shell_open or action_type == "key"
+            
+            if i < len(steps) - 1 and INTER_STEP_DELAY:
+                time.sleep(INTER_STEP_DELAY)
+    
+    if pending:
+        log.debug("[exec] sending %d input events in one batch", len(pending))
+    _send_inputs(pending)
 
 
 def execute_action_plan(plan: Dict) -> None:
@@ -78,25 +319,32 @@ def execute_action_plan(plan: Dict) -> None:
         
         if action_type == "sequence":
             steps = plan.get("steps", [])
-            print(f"[exec] executing sequence with {len(steps)} steps")
+            log.info("[exec] executing sequence with %d steps", len(steps))
+            
+            # Pure keyboard sequences are batched into as few SendInput calls as possible
+            if all(step.get("action_type") in KEYBOARD_ACTIONS for step in steps):
+                execute_batched(steps)
+                return
             
             for i, step in enumerate(steps):
-                print(f"[exec] step {i+1}/{len(steps)}")
+                log.debug("[exec] step %d/%d", i + 1, len(steps))
                 execute_single_action(step)
                 
                 # Small delay between steps for UI to react
-                if i < len(steps) - 1:  # Don't sleep after last step
-                    time.sleep(0.15)
+                if i < len(steps) - 1 and INTER_STEP_DELAY:  # Don't sleep after last step
+                    time.sleep(INTER_STEP_DELAY)
                     
         else:
             # Single action
             execute_single_action(plan)
             
     except Exception as e:
-        print(f"[exec] ERROR executing plan: {e}")
+        log.error("[exec] ERROR executing plan: %s", e)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Test the action executor with various action types
     print("Testing action executor...")
     print("Note: This will perform actual UI actions on your screen!")
@@ -5,48 +5,122 @@ This module provides voice activity detection and continuous recording
 from the default microphone until the user stops talking.
 """
 
+import asyncio
+import logging
+import math
 import numpy as np
 import sounddevice as sd
-import time
 import signal
 import sys
 from typing import List
 
+log = logging.getLogger(__name__)
+
 # Audio recording constants
 SAMPLE_RATE = 16000
 CHANNELS = 1
+BLOCK_SIZE = 4096  # 256 ms per chunk at 16 kHz
 SILENCE_SECONDS = 1.0
 ENERGY_THRESHOLD = 0.01
+# Energy is compared as mean square (RMS²) to avoid a sqrt per chunk
+ENERGY_THRESHOLD_SQ = ENERGY_THRESHOLD ** 2
+
+# Adaptive threshold (Moattar-Homayounpour style): the noise floor is estimated
+# from the first CALIBRATION_SECONDS and then tracked over silent chunks, so
+# the threshold follows the room and may end up above or below ENERGY_THRESHOLD.
+# ENERGY_THRESHOLD is only used until calibration finishes.
+CALIBRATION_SECONDS = 0.3
+NOISE_RATIO = 10.0  # speech must be ~10 dB above the noise floor
+ENERGY_FLOOR_SQ = 0.001 ** 2  # lower bound so digital silence still counts as silence
+
+# Give up (and discard the audio) if nothing louder than the threshold is heard
+# for this long, instead of sending background noise to transcription
+SPEECH_TIMEOUT_SECONDS = 10.0
 
 # Minimum audio duration before we start looking for silence
 MIN_AUDIO_SECONDS = 0.5
 
+# Maximum length of a single command; recording stops when the buffer is full
+MAX_SECONDS = 30
+
+# Number of consecutive quiet chunks that make up SILENCE_SECONDS
+SILENCE_CHUNKS = math.ceil(SILENCE_SECONDS * SAMPLE_RATE / BLOCK_SIZE)
 
-def record_command() -> np.ndarray:
+
+def _energy_threshold(noise_energy: float) -> float:
+    """
+    Compute the speech/silence threshold from the current noise floor.
+    
+    Args:
+        noise_energy: Estimated mean-square energy of background noise
+        
+    Returns:
+        float: Mean-square energy threshold
+    """
+    return max(noise_energy * NOISE_RATIO, ENERGY_FLOOR_SQ)
+
+
+async def record_command() -> np.ndarray:
     """
     Record audio from the default microphone until voice activity stops.
     
     Uses simple energy-based voice activity detection:
-    - Records continuously while energy > threshold
-    - After minimum audio duration, starts silence timer
-    - Stops recording after sustained silence period
+    - Estimates the noise floor from the first few chunks, drops it to any
+      quieter chunk (the user may already be talking during calibration)
+      and averages it over silent chunks afterwards
+    - Records continuously while energy > adaptive threshold
+    - After minimum audio duration and once speech has been heard, stops
+      when the last SILENCE_SECONDS of chunks are all below the threshold
+      (measured in samples, not wall-clock time)
+    - Returns no audio if no speech is heard within SPEECH_TIMEOUT_SECONDS
+    
+    Audio is captured by a sounddevice callback that pushes chunks into an
+    asyncio queue, so the event loop stays free for other work (screen
+    capture, request setup) while the user is speaking.
     
     Returns:
         np.ndarray: Float32 audio samples at 16 kHz mono, shape (N,)
+        
+    Raises:
+        KeyboardInterrupt: If Ctrl+C is pressed while recording
     """
-    print("[listening...]")
+    log.info("[listening...]")
+    
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
     
-    audio_chunks: List[np.ndarray] = []
-    silence_start_time = None
-    total_audio_time = 0.0
+    # Preallocated capture buffer, filled in place chunk by chunk
+    audio_buffer = np.empty(MAX_SECONDS * SAMPLE_RATE, dtype=np.float32)
+    pos = 0
+    
+    # Mean-square energy of every captured chunk, for the silence window
+    chunk_energies = np.empty(len(audio_buffer) // BLOCK_SIZE + 1, dtype=np.float64)
+    chunk_count = 0
+    
+    # Adaptive threshold state
+    calibration_energies: List[float] = []
+    noise_energy = None
+    energy_threshold_sq = ENERGY_THRESHOLD_SQ
+    silent_chunks = 0
+    
+    # Loudest chunk before the trailing silence window; speech has been heard
+    # once it is above the threshold
+    peak_energy = 0.0
+    no_speech = False
     
     # Global flag for graceful interruption
     interrupted = False
     
+    def audio_callback(indata, frames, time_info, status):
+        # Runs on the PortAudio thread; hand the chunk over to the event loop
+        loop.call_soon_threadsafe(queue.put_nowait, (indata.copy(), bool(status.input_overflow)))
+    
     def signal_handler(signum, frame):
         nonlocal interrupted
         interrupted = True
-        print("\n[interrupted]")
+        log.info("\n[interrupted]")
+        # Wake up the consumer if it is waiting for a chunk
+        loop.call_soon_threadsafe(queue.put_nowait, None)
     
     # Set up Ctrl+C handler
     original_handler = signal.signal(signal.SIGINT, signal_handler)
@@ -57,74 +131,110 @@ def record_command() -> np.ndarray:
             samplerate=SAMPLE_RATE,
             channels=CHANNELS,
             dtype=np.float32,
-            blocksize=1024
-        ) as stream:
+            blocksize=BLOCK_SIZE,
+            callback=audio_callback
+        ):
             
             while not interrupted:
-                # Read audio chunk
-                audio_chunk, overflowed = stream.read(1024)
+                # Wait for the next audio chunk
+                item = await queue.get()
+                if item is None:
+                    break
+                audio_chunk, overflowed = item
                 
                 if overflowed:
-                    print("[warning] audio buffer overflow")
+                    log.warning("[warning] audio buffer overflow")
+                
+                # View mono (frames, 1) chunk as 1D (no copy) and store it in the buffer
+                audio_chunk = audio_chunk.ravel()
+                n = min(len(audio_chunk), len(audio_buffer) - pos)
+                chunk_view = audio_buffer[pos:pos + n]
+                chunk_view[:] = audio_chunk[:n]
+                pos += n
+                
+                if pos >= len(audio_buffer):
+                    log.warning("[warning] reached %ds recording limit", MAX_SECONDS)
+                    break
+                
+                # Calculate energy (mean square) with a single BLAS dot product
+                energy_sq = float(np.dot(chunk_view, chunk_view)) / n
+                chunk_energies[chunk_count] = energy_sq
+                chunk_count += 1
+                total_audio_time = pos / SAMPLE_RATE
                 
-                # Flatten chunk to 1D array
-                audio_chunk = audio_chunk.flatten()
-                audio_chunks.append(audio_chunk)
+                # Update the noise floor estimate
+                if noise_energy is None:
+                    calibration_energies.append(energy_sq)
+                    if total_audio_time >= CALIBRATION_SECONDS:
+                        noise_energy = min(calibration_energies)
+                        energy_threshold_sq = _energy_threshold(noise_energy)
+                elif energy_sq * NOISE_RATIO < noise_energy:
+                    # Far quieter than the floor: calibration heard speech,
+                    # restart the estimate from this chunk
+                    silent_chunks = 0
+                    noise_energy = energy_sq
+                    energy_threshold_sq = _energy_threshold(noise_energy)
+                elif energy_sq < energy_threshold_sq:
+                    silent_chunks += 1
+                    noise_energy = (silent_chunks * noise_energy + energy_sq) / (silent_chunks + 1)
+                    energy_threshold_sq = _energy_threshold(noise_energy)
                 
-                # Calculate energy (mean absolute value)
-                energy = np.mean(np.abs(audio_chunk))
-                chunk_duration = len(audio_chunk) / SAMPLE_RATE
-                total_audio_time += chunk_duration
+                # Voice activity detection: once speech has been heard, stop
+                # when the whole trailing silence window is below the threshold
+                if chunk_count > SILENCE_CHUNKS:
+                    peak_energy = max(peak_energy, chunk_energies[chunk_count - SILENCE_CHUNKS - 1])
+                window_peak = chunk_energies[max(chunk_count - SILENCE_CHUNKS, 0):chunk_count].max()
                 
-                # Voice activity detection logic
-                if energy < ENERGY_THRESHOLD:
-                    # Low energy - potentially silence
-                    if total_audio_time >= MIN_AUDIO_SECONDS:
-                        # We've heard enough audio, start silence timer
-                        if silence_start_time is None:
-                            silence_start_time = time.time()
-                        else:
-                            # Check if we've been silent long enough
-                            silence_duration = time.time() - silence_start_time
-                            if silence_duration >= SILENCE_SECONDS:
-                                # Stop recording
-                                break
-                    else:
-                        # Not enough audio yet, reset silence timer
-                        silence_start_time = None
-                else:
-                    # High energy - voice detected, reset silence timer
-                    silence_start_time = None
+                if (total_audio_time >= MIN_AUDIO_SECONDS
+                        and chunk_count >= SILENCE_CHUNKS
+                        and peak_energy >= energy_threshold_sq
+                        and window_peak < energy_threshold_sq):
+                    break
+                
+                if (total_audio_time >= SPEECH_TIMEOUT_SECONDS
+                        and max(peak_energy, window_peak) < energy_threshold_sq):
+                    no_speech = True
+                    break
     
     except KeyboardInterrupt:
         interrupted = True
-        print("\n[interrupted]")
+        log.info("\n[interrupted]")
     
     finally:
         # Restore original signal handler
         signal.signal(signal.SIGINT, original_handler)
     
-    # Concatenate all audio chunks
-    if audio_chunks:
-        full_audio = np.concatenate(audio_chunks)
-        # Ensure float32 and proper shape
-        full_audio = full_audio.astype(np.float32).flatten()
-        print(f"[heard command] ({len(full_audio)/SAMPLE_RATE:.1f}s)")
+    # Ctrl+C stops the agent instead of acting on the partial recording
+    if interrupted:
+        raise KeyboardInterrupt
+    
+    if no_speech:
+        log.info("[no speech detected]")
+        return np.array([], dtype=np.float32)
+    
+    # Return the filled part of the buffer (a view, no copy)
+    if pos > 0:
+        full_audio = audio_buffer[:pos]
+        log.info("[heard command] (%.1fs)", len(full_audio) / SAMPLE_RATE)
         return full_audio
     else:
-        print("[no audio captured]")
+        log.info("[no audio captured]")
         return np.array([], dtype=np.float32)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Test the audio recording
     print("Testing audio recording...")
     print("Speak something, then stay quiet for 1 second to stop.")
     print("Press Ctrl+C to interrupt early.")
     
     try:
-        audio = record_command()
+        audio = asyncio.run(record_command())
         print(f"Recorded {len(audio)} samples ({len(audio)/SAMPLE_RATE:.2f} seconds)")
         print(f"Audio range: [{np.min(audio):.3f}, {np.max(audio):.3f}]")
+    except KeyboardInterrupt:
+        print("Recording interrupted")
     except Exception as e:
         print(f"Error: {e}")
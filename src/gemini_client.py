@@ -9,58 +9,99 @@ The Computer Use model can "see" a computer screen and "act" by generating
 specific UI actions like mouse clicks and keyboard inputs.
 """
 
-import base64
+import asyncio
+import functools
+import hashlib
+import io
+import logging
 import os
+import re
+import struct
+import threading
+from collections import OrderedDict, deque
+import httpx
 import numpy as np
-from typing import Dict, List, Tuple
+import PIL.Image
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
 
+# orjson is optional; fall back to the stdlib parser when it is not installed.
+# Both accept str and raise a ValueError subclass on malformed input.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+log = logging.getLogger(__name__)
+
 # Load environment variables from env file
 load_dotenv('env')
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Shared Gemini client, created on first use so its connection pool is reused
+_client = None
+_client_lock = threading.Lock()
 
-def propose_action(user_request: str,
-                   screenshot_png: bytes,
-                   screen_size: Tuple[int, int],
-                   history: List[Dict],
-                   audio_samples: np.ndarray = None) -> Dict:
-    """
-    Propose the next UI action using Gemini 2.5 Flash with audio + screenshot.
-    
-    Args:
-        user_request: The user's spoken command (transcribed text)
-        screenshot_png: PNG bytes of current screen
-        screen_size: (width, height) of the screen
-        history: List of previous user_request + action_taken pairs
-        audio_samples: Raw audio samples (optional, for direct audio processing)
-        
-    Returns:
-        Dict: Action to execute with standardized format
-    """
-    # Log the incoming request
-    print(f"[planner] request: {user_request}")
-    
-    try:
-        # Initialize Gemini client
-        client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-        
-        # Convert screenshot to base64 for API
-        screenshot_base64 = base64.b64encode(screenshot_png).decode('utf-8')
-        
-        # Build conversation history for context
-        history_context = ""
-        if history:
-            history_context = "\n\nRecent actions:\n"
-            for i, item in enumerate(history[-3:]):  # Last 3 actions for context
-                history_context += f"{i+1}. User: {item['user_request']}\n"
-                history_context += f"   Action: {item['action_taken']}\n"
-        
-        # Create the prompt for Gemini 2.5 Flash
-        prompt = f"""You are a desktop automation assistant. Analyze the screenshot and user's voice command to determine where to click.
+# Transport settings for the SDK's httpx clients: requests are multiplexed
+# over one kept-alive HTTP/2 connection, so steady-state commands skip the
+# TCP + TLS handshake (HTTP/2 needs the h2 package from httpx[http2])
+_HTTP_CLIENT_ARGS = {
+    "http2": True,
+    "limits": httpx.Limits(max_keepalive_connections=4),
+}
+_HTTP_OPTIONS = types.HttpOptions(
+    client_args=_HTTP_CLIENT_ARGS,
+    async_client_args=_HTTP_CLIENT_ARGS,
+)
+
+# Generation settings shared by every request: the response is constrained
+# to a small JSON object, decoded greedily, without thinking tokens
+_ACTION_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "x": types.Schema(type=types.Type.INTEGER),
+        "y": types.Schema(type=types.Type.INTEGER),
+        "reasoning": types.Schema(type=types.Type.STRING),
+    },
+    required=["x", "y"],
+    property_ordering=["x", "y", "reasoning"],
+)
+_GENERATE_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=_ACTION_SCHEMA,
+    temperature=0,
+    max_output_tokens=128,
+    thinking_config=types.ThinkingConfig(thinking_budget=0),
+)
+
+# LRU cache of (screenshot hash, normalized request) -> action, so repeated
+# commands on an unchanged screen skip the API call
+SCREEN_CACHE_SIZE = 32
+_screen_cache: "OrderedDict[Tuple[bytes, str], Dict]" = OrderedDict()
 
-Screen dimensions: {screen_size[0]}x{screen_size[1]} pixels
+# Screenshots larger than this are downscaled and re-encoded as JPEG before
+# upload; the model resizes large images internally anyway
+UPLOAD_MAX_SIZE = (1280, 720)
+UPLOAD_JPEG_QUALITY = 85
+
+# RIFF/WAVE header for 16-bit mono PCM audio
+AUDIO_SAMPLE_RATE = 16000
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+# Per-thread float32 scratch for clipping out-of-range samples before the
+# int16 cast, grown to the longest clipped recording
+_audio_scratch = threading.local()
+
+# Number of recent actions shown to the model in the prompt
+HISTORY_SIZE = 3
+
+# Prompt for Gemini 2.5 Flash, built once; only the request-specific fields
+# are filled in per call (literal braces are escaped as {{ }})
+_PROMPT_TEMPLATE = """You are a desktop automation assistant. Analyze the screenshot and user's voice command to determine where to click.
+
+Screen dimensions: {width}x{height} pixels
 User's request: "{user_request}"
 {history_context}
 
@@ -68,7 +109,6 @@ Look at the screenshot and identify the exact pixel coordinates (x, y) where you
 
 Respond with ONLY a JSON object in this exact format:
 {{
-    "action_type": "click",
     "x": <pixel_x_coordinate>,
     "y": <pixel_y_coordinate>,
     "reasoning": "<brief explanation of why you chose these coordinates>"
@@ -83,114 +123,483 @@ Examples:
 
 Be precise with coordinates. Look for visual elements that match the user's request."""
 
-        # Prepare content parts
-        parts = [{"text": prompt}]
+# Rule keywords, precompiled so each rule is a single regex scan. The rules
+# run before Gemini, so keywords must match whole words: "restart chrome" or
+# "startup apps" go to the model instead of clicking the Start menu. The
+# longer phrases ("open start", "click start", "start menu", "open settings")
+# all contain the bare keyword, so only the distinct alternatives are listed.
+_START_RE = re.compile(r'\b(?:start|open windows)\b')
+_SETTINGS_RE = re.compile(r'\bsettings\b')
+
+
+def _get_client() -> genai.Client:
+    """
+    Return the shared Gemini client, creating it on first use.
+    
+    Returns:
+        genai.Client: Client configured with GEMINI_API_KEY and the pooled
+            HTTP/2 transport
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = genai.Client(api_key=GEMINI_API_KEY, http_options=_HTTP_OPTIONS)
+    return _client
+
+
+def format_history_line(user_request: str, action_taken: str) -> str:
+    """
+    Format one executed action as a line of the prompt's history section.
+    
+    Args:
+        user_request: The user's spoken command
+        action_taken: Short description of the action executed for it
+        
+    Returns:
+        str: Pre-formatted history line
+    """
+    return f"- User: {user_request}\n   Action: {action_taken}\n"
+
+
+def render_history(history_lines: Iterable[str]) -> str:
+    """
+    Render pre-formatted history lines into the prompt's history section.
+    
+    Callers keep the result and pass it to propose_action_async, re-rendering
+    only when a new action is recorded.
+    
+    Args:
+        history_lines: Lines from format_history_line, oldest first (at most
+            HISTORY_SIZE are expected)
         
-        # Add screenshot
-        parts.append({
-            "inline_data": {
-                "mime_type": "image/png",
-                "data": screenshot_base64
-            }
-        })
+    Returns:
+        str: History section for the prompt, or "" when there is no history
+    """
+    body = "".join(history_lines)
+    return "\n\nRecent actions:\n" + body if body else ""
+
+
+def _clipped_samples(audio_samples: np.ndarray) -> np.ndarray:
+    """
+    Return the samples limited to [-1, 1], so the int16 cast cannot wrap.
+    
+    Samples already in range (the usual case) are returned as-is; otherwise
+    they are clipped into this thread's scratch buffer, leaving the caller's
+    array untouched.
+    
+    Args:
+        audio_samples: Float samples, nominally in [-1, 1]
         
-        # Add audio if available
-        if audio_samples is not None and len(audio_samples) > 0:
-            # Convert audio to base64 (assuming 16kHz mono float32)
-            import io
-            import wave
-            
-            # Convert numpy array to WAV bytes
-            audio_bytes = io.BytesIO()
-            with wave.open(audio_bytes, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(16000)  # 16kHz
-                wav_file.writeframes((audio_samples * 32767).astype(np.int16).tobytes())
+    Returns:
+        np.ndarray: The input, or a view of the scratch buffer holding the
+            clipped samples
+    """
+    n = len(audio_samples)
+    if n == 0 or (audio_samples.max() <= 1.0 and audio_samples.min() >= -1.0):
+        return audio_samples
+    
+    scratch = getattr(_audio_scratch, "buffer", None)
+    if scratch is None or len(scratch) < n:
+        scratch = _audio_scratch.buffer = np.empty(n, dtype=np.float32)
+    
+    return np.clip(audio_samples, -1.0, 1.0, out=scratch[:n])
+
+
+def _encode_wav(audio_samples: np.ndarray) -> bytearray:
+    """
+    Encode float audio samples as a 16-bit mono WAV file.
+    
+    The header is packed into a preallocated buffer and the samples are
+    scaled and cast straight into its PCM section. Out-of-range samples
+    saturate instead of wrapping around.
+    
+    Args:
+        audio_samples: Float32 samples in [-1, 1] at AUDIO_SAMPLE_RATE
+        
+    Returns:
+        bytearray: Complete WAV file contents
+    """
+    data_size = len(audio_samples) * 2
+    wav = bytearray(_WAV_HEADER.size + data_size)
+    _WAV_HEADER.pack_into(
+        wav, 0,
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, 1,  # PCM, mono
+        AUDIO_SAMPLE_RATE, AUDIO_SAMPLE_RATE * 2, 2, 16,  # byte rate, block align, bits
+        b'data', data_size
+    )
+    
+    # Scale and cast straight into the buffer's PCM section in one pass
+    pcm = np.frombuffer(wav, dtype='<i2', offset=_WAV_HEADER.size)
+    np.multiply(_clipped_samples(audio_samples), 32767.0, out=pcm, casting='unsafe')
+    return wav
+
+
+def _cache_key(user_request: str, image_data: bytes) -> Tuple[bytes, str]:
+    """
+    Build the screen cache key for a request.
+    
+    The key hashes the encoded upload rather than the raw frame, so no copy
+    of the full-resolution pixels is made; an unchanged screen encodes to
+    the same bytes.
+    
+    Args:
+        user_request: The user's spoken command
+        image_data: Encoded screenshot bytes as uploaded
+        
+    Returns:
+        Tuple[bytes, str]: SHA-256 of the uploaded image + normalized request
+    """
+    return hashlib.sha256(image_data).digest(), user_request.lower().strip()
+
+
+def _rule_action(user_request: str, screen_size: Tuple[int, int]) -> Optional[Dict]:
+    """
+    Answer the request from the built-in rules, without touching the screenshot.
+    
+    Args:
+        user_request: The user's spoken command (transcribed text)
+        screen_size: (width, height) of the screen
+        
+    Returns:
+        Optional[Dict]: Rule-based action, or None if no rule matches
+    """
+    fast_action = _match_rule(user_request, screen_size)
+    if fast_action is not None:
+        log.info("[planner] rule match, skipping Gemini: %s", fast_action)
+    return fast_action
+
+
+def _cached_action(cache_key: Tuple[bytes, str]) -> Optional[Dict]:
+    """
+    Return the previous answer if the screen and request are unchanged.
+    
+    Args:
+        cache_key: Uploaded image hash + normalized request
+        
+    Returns:
+        Optional[Dict]: Copy of the cached action, or None on a cache miss
+    """
+    cached_action = _screen_cache.get(cache_key)
+    if cached_action is None:
+        return None
+    
+    _screen_cache.move_to_end(cache_key)
+    log.info("[planner] cache hit: %s", cached_action)
+    return dict(cached_action)
+
+
+def _prepare_screenshot(screenshot: Union[bytes, PIL.Image.Image],
+                        mime_type: str) -> Tuple[bytes, str, float]:
+    """
+    Downscale the screenshot to UPLOAD_MAX_SIZE and encode it for upload.
+    
+    Encoded bytes that are already small enough are sent unchanged; larger
+    images are resized and re-encoded as JPEG to cut the upload size.
+    
+    Args:
+        screenshot: Encoded image bytes or PIL image of current screen
+        mime_type: MIME type of the screenshot bytes
+        
+    Returns:
+        Tuple[bytes, str, float]: Encoded image, its MIME type and the scale
+            factor applied
+    """
+    # Image.open only parses the header, so checking the size is cheap
+    is_image = isinstance(screenshot, PIL.Image.Image)
+    image = screenshot if is_image else PIL.Image.open(io.BytesIO(screenshot))
+    scale = min(UPLOAD_MAX_SIZE[0] / image.width, UPLOAD_MAX_SIZE[1] / image.height, 1.0)
+    
+    if scale == 1.0 and not is_image:
+        return screenshot, mime_type, scale
+    
+    if scale < 1.0:
+        image = image.resize((int(image.width * scale), int(image.height * scale)), PIL.Image.BILINEAR)
+    
+    jpeg_buffer = io.BytesIO()
+    image.convert("RGB").save(jpeg_buffer, format="JPEG", quality=UPLOAD_JPEG_QUALITY)
+    return jpeg_buffer.getvalue(), "image/jpeg", scale
+
+
+def _build_parts(user_request: str,
+                 screenshot: Union[bytes, PIL.Image.Image],
+                 mime_type: str,
+                 screen_size: Tuple[int, int],
+                 audio_samples: np.ndarray = None,
+                 history_context: str = "") -> Tuple[List[types.Part], float, Tuple[bytes, str]]:
+    """
+    Build the prompt, screenshot and audio parts for a Gemini request.
+    
+    The prompt describes the (possibly downscaled) uploaded image, so the
+    model answers in its coordinate space; divide by the returned scale to
+    get screen coordinates.
+    
+    Args:
+        user_request: The user's spoken command (transcribed text)
+        screenshot: Encoded image bytes or PIL image of current screen
+        mime_type: MIME type of the screenshot bytes
+        screen_size: (width, height) of the screen
+        audio_samples: Raw audio samples (optional, for direct audio processing)
+        history_context: Rendered history section from render_history
+        
+    Returns:
+        Tuple[List[types.Part], float, Tuple[bytes, str]]: Content parts, the
+            screenshot scale and the screen cache key
+    """
+    image_data, image_mime_type, scale = _prepare_screenshot(screenshot, mime_type)
+    
+    # Fill in the prompt for Gemini 2.5 Flash
+    prompt = _PROMPT_TEMPLATE.format(
+        width=int(screen_size[0] * scale),
+        height=int(screen_size[1] * scale),
+        user_request=user_request,
+        history_context=history_context
+    )
+    
+    # Prepare content parts
+    parts = [
+        types.Part.from_text(text=prompt),
+        types.Part.from_bytes(data=image_data, mime_type=image_mime_type),
+    ]
+    
+    # Add audio if available
+    if audio_samples is not None and len(audio_samples) > 0:
+        # Convert audio to WAV (assuming 16kHz mono float32)
+        parts.append(types.Part.from_bytes(data=_encode_wav(audio_samples), mime_type="audio/wav"))
+    
+    return parts, scale, _cache_key(user_request, image_data)
+
+
+class _JsonObjectScanner:
+    """
+    Incrementally locate the first complete JSON object in streamed text.
+    
+    Tracks brace depth (ignoring braces inside strings) as chunks arrive, so
+    the caller can stop the stream as soon as the object is closed.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Add a chunk of response text.
+        
+        Args:
+            chunk: Next piece of streamed text
             
-            audio_base64 = base64.b64encode(audio_bytes.getvalue()).decode('utf-8')
-            parts.append({
-                "inline_data": {
-                    "mime_type": "audio/wav",
-                    "data": audio_base64
-                }
-            })
-
-        # Create the request using Gemini 2.5 Flash
-        response = client.models.generate_content(
+        Returns:
+            Optional[str]: The JSON object text once its closing brace arrives
+        """
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._start == -1:
+                if ch == '{':
+                    self._start = i
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = i + 1
+                    return text[self._start:i + 1]
+        self._pos = len(text)
+        return None
+
+
+def _parse_response(json_str: Optional[str],
+                    content: str,
+                    scale: float,
+                    cache_key: Tuple[bytes, str]) -> Optional[Dict]:
+    """
+    Convert the JSON object from a Gemini response into an action and cache it.
+    
+    Args:
+        json_str: JSON object text found in the response, if any
+        content: Full response text received, for logging
+        scale: Screenshot scale factor; coordinates are divided by it
+        cache_key: Uploaded image hash + normalized request to cache the action under
+        
+    Returns:
+        Optional[Dict]: Parsed action, or None if the response has no usable JSON
+    """
+    if json_str is None:
+        log.warning("[planner] no JSON found in response: %s", content)
+        return None
+    
+    try:
+        action_data = json_loads(json_str)
+    except ValueError as e:
+        log.warning("[planner] JSON parse error: %s", e)
+        log.debug("[planner] raw response: %s", content)
+        return None
+    
+    # Convert to our standard format
+    action = {
+        "action_type": "click",
+        "x": round(action_data.get("x", 0) / scale),
+        "y": round(action_data.get("y", 0) / scale),
+        "needs_confirmation": False
+    }
+    
+    log.info("[planner] plan: %s", action)
+    log.info("[planner] reasoning: %s", action_data.get('reasoning', 'No reasoning provided'))
+    
+    _screen_cache[cache_key] = action
+    if len(_screen_cache) > SCREEN_CACHE_SIZE:
+        _screen_cache.popitem(last=False)
+    return dict(action)
+
+
+async def propose_action_async(user_request: str,
+                               screenshot: Union[bytes, PIL.Image.Image],
+                               screen_size: Tuple[int, int],
+                               audio_samples: np.ndarray = None,
+                               mime_type: str = "image/png",
+                               history_context: str = "") -> Dict:
+    """
+    Propose the next UI action using Gemini 2.5 Flash with audio + screenshot.
+    
+    Request assembly runs on a worker thread and the network call uses the
+    SDK's asyncio client, so the event loop stays free for screen capture or
+    audio recording while the planner works. This is the only planner entry
+    point; run it with asyncio.run() from synchronous code.
+    
+    Args:
+        user_request: The user's spoken command (transcribed text)
+        screenshot: Encoded image bytes or PIL image of current screen, sent as-is
+        screen_size: (width, height) of the screen
+        audio_samples: Raw audio samples (optional, for direct audio processing)
+        mime_type: MIME type of the screenshot bytes: "image/png", "image/jpeg"
+            or "image/webp" (JPEG/WebP uploads are much smaller than PNG);
+            ignored for PIL images
+        history_context: Rendered history section from render_history
+            (empty for no history)
+        
+    Returns:
+        Dict: Action to execute with standardized format
+    """
+    # Log the incoming request
+    log.info("[planner] request: %s", user_request)
+    
+    # Fast path: commands covered by the built-in rules skip hashing and the API
+    action = _rule_action(user_request, screen_size)
+    if action is not None:
+        return action
+    
+    try:
+        # Assemble the request (image encoding, cache key, WAV encoding) on a
+        # worker thread
+        parts, scale, cache_key = await asyncio.to_thread(
+            _build_parts, user_request, screenshot, mime_type, screen_size,
+            audio_samples, history_context
+        )
+        
+        # Reuse the previous answer if the screen and request are unchanged
+        action = _cached_action(cache_key)
+        if action is not None:
+            return action
+        
+        # Reuse the shared Gemini client
+        client = _get_client()
+        
+        # Stream the response and stop as soon as the JSON object is complete
+        scanner = _JsonObjectScanner()
+        json_str = None
+        stream = await client.aio.models.generate_content_stream(
             model="gemini-2.5-flash",
-            contents=[{"parts": parts}]
+            contents=parts,
+            config=_GENERATE_CONFIG
         )
+        try:
+            async for chunk in stream:
+                if chunk.text:
+                    json_str = scanner.feed(chunk.text)
+                    if json_str is not None:
+                        break
+        finally:
+            await stream.aclose()
         
-        # Parse the response
-        if response.candidates and response.candidates[0].content:
-            content = response.candidates[0].content.parts[0].text
-            
-            # Try to extract JSON from the response
-            import json
-            try:
-                # Look for JSON in the response
-                start_idx = content.find('{')
-                end_idx = content.rfind('}') + 1
-                if start_idx != -1 and end_idx != 0:
-                    json_str = content[start_idx:end_idx]
-                    action_data = json.loads(json_str)
-                    
-                    # Convert to our standard format
-                    action = {
-                        "action_type": "click",
-                        "x": action_data.get("x", 0),
-                        "y": action_data.get("y", 0),
-                        "needs_confirmation": False
-                    }
-                    
-                    print(f"[planner] plan: {action}")
-                    print(f"[planner] reasoning: {action_data.get('reasoning', 'No reasoning provided')}")
-                    return action
-                else:
-                    print(f"[planner] no JSON found in response: {content}")
-            except json.JSONDecodeError as e:
-                print(f"[planner] JSON parse error: {e}")
-                print(f"[planner] raw response: {content}")
+        action = _parse_response(json_str, scanner.text, scale, cache_key)
+        if action is not None:
+            return action
         
         # Fallback to rule-based logic if API fails
-        print("[planner] API failed, using fallback logic")
+        log.warning("[planner] API failed, using fallback logic")
         return fallback_action_logic(user_request, screen_size)
         
     except Exception as e:
-        print(f"[planner] API error: {e}")
-        print("[planner] using fallback logic")
+        log.error("[planner] API error: %s", e)
+        log.warning("[planner] using fallback logic")
         return fallback_action_logic(user_request, screen_size)
 
 
-def fallback_action_logic(user_request: str, screen_size: Tuple[int, int]) -> Dict:
+@functools.lru_cache(maxsize=128)
+def _classify(request_lower: str) -> str:
     """
-    Fallback rule-based logic when Gemini API is unavailable.
+    Classify a lowercased request into one of the built-in rules.
+    
+    Cached, since the same short commands are repeated often.
+    
+    Args:
+        request_lower: The user's spoken command, lowercased
+        
+    Returns:
+        str: "start", "settings" or "none"
+    """
+    # Rule 1: Start menu / Windows menu
+    if _START_RE.search(request_lower):
+        return "start"
+    
+    # Rule 2: Settings
+    if _SETTINGS_RE.search(request_lower):
+        return "settings"
+    
+    return "none"
+
+
+def _match_rule(user_request: str, screen_size: Tuple[int, int]) -> Optional[Dict]:
+    """
+    Match the request against the built-in rules.
     
     Args:
         user_request: The user's spoken command
         screen_size: (width, height) of the screen
         
     Returns:
-        Dict: Action to execute
+        Optional[Dict]: Action for the matching rule, or None if no rule matches
     """
-    request_lower = user_request.lower()
+    rule = _classify(user_request.lower())
     
-    # Rule 1: Start menu / Windows menu
-    start_keywords = ["open start", "open windows", "click start", "start menu", "start"]
-    if any(keyword in request_lower for keyword in start_keywords):
-        action = {
+    if rule == "start":
+        return {
             "action_type": "click",
             "x": 30,
             "y": screen_size[1] - 30,  # Bottom-left corner
             "needs_confirmation": False
         }
-        print(f"[planner] plan: {action}")
-        return action
     
-    # Rule 2: Settings
-    if "settings" in request_lower or "open settings" in request_lower:
-        action = {
+    if rule == "settings":
+        return {
             "action_type": "sequence",
             "steps": [
                 {"action_type": "key", "key": "win"},
@@ -199,25 +608,42 @@ def fallback_action_logic(user_request: str, screen_size: Tuple[int, int]) -> Di
             ],
             "needs_confirmation": False
         }
-        print(f"[planner] plan: {action}")
-        return action
     
-    # Rule 3: Default - no action
-    action = {
-        "action_type": "none",
-        "needs_confirmation": False
-    }
-    print(f"[planner] plan: {action}")
+    return None
+
+
+def fallback_action_logic(user_request: str, screen_size: Tuple[int, int]) -> Dict:
+    """
+    Fallback rule-based logic when Gemini API is unavailable.
+    
+    Args:
+        user_request: The user's spoken command
+        screen_size: (width, height) of the screen
+        
+    Returns:
+        Dict: Action to execute
+    """
+    action = _match_rule(user_request, screen_size)
+    
+    # Default - no action
+    if action is None:
+        action = {
+            "action_type": "none",
+            "needs_confirmation": False
+        }
+    log.info("[planner] plan: %s", action)
     return action
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Test the Gemini integration
     print("Testing Gemini Computer Use integration...")
     print("Note: Requires GEMINI_API_KEY environment variable")
     
     # Check for API key
-    if not os.getenv("GEMINI_API_KEY"):
+    if not GEMINI_API_KEY:
         print("ERROR: GEMINI_API_KEY environment variable not set")
         print("Set it with: set GEMINI_API_KEY=your_api_key_here")
         exit(1)
@@ -228,9 +654,6 @@ if __name__ == "__main__":
     # Mock screenshot (empty bytes for testing)
     screenshot_png = b""
     
-    # Mock history
-    history = []
-    
     # Test cases
     test_cases = [
         "open start menu",
@@ -242,15 +665,23 @@ if __name__ == "__main__":
         "random command"
     ]
     
-    for test_request in test_cases:
+    async def run_test_cases():
+        # Requests are independent, so send them all at once; total time is
+        # roughly the slowest call instead of the sum of all calls
+        return await asyncio.gather(*(
+            propose_action_async(test_request, screenshot_png, screen_size)
+            for test_request in test_cases
+        ))
+    
+    results = asyncio.run(run_test_cases())
+    history_lines: deque = deque(maxlen=HISTORY_SIZE)
+    
+    for test_request, result in zip(test_cases, results):
         print(f"\n--- Testing: '{test_request}' ---")
-        result = propose_action(test_request, screenshot_png, screen_size, history)
         print(f"Result: {result}")
         
-        # Simulate adding to history
-        history.append({
-            "user_request": test_request,
-            "action_taken": result
-        })
+        # Simulate adding to history (after the concurrent run, in order)
+        history_lines.append(format_history_line(test_request, str(result)))
     
-    print(f"\nFinal history length: {len(history)}")
+    print(f"\nFinal history length: {len(history_lines)}")
+    print(f"Prompt history section: {render_history(history_lines)!r}")
@@ -13,19 +13,125 @@ This is the main orchestration loop that coordinates all modules:
 The user interacts only through voice - no keyboard input required.
 """
 
+import asyncio
+import logging
 import sys
-import time
-from typing import List, Dict
+from collections import deque
+from typing import Deque, Dict
 
 # Add src directory to path for sibling imports
 sys.path.append('.')
 
+# Configure logging before importing the sibling modules so their
+# import-time messages (e.g. the background Whisper load) are shown
+logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
 from audio_listener import record_command
 from speech_to_text import transcribe_audio
 from screen_capture import capture_screen
-from gemini_client import propose_action
+from gemini_client import (
+    HISTORY_SIZE,
+    format_history_line,
+    propose_action_async,
+    render_history,
+)
 from action_executor import execute_action_plan
 
+log = logging.getLogger(__name__)
+
+
+def summarize_plan(plan: Dict) -> str:
+    """
+    Render an action plan as a short one-line description.
+    
+    Args:
+        plan: Action plan returned by the planner
+        
+    Returns:
+        str: Summary such as "click at (30,1050)" or "key win, type 'settings'"
+    """
+    action_type = plan.get("action_type", "none")
+    
+    if action_type == "sequence":
+        return ", ".join(summarize_plan(step) for step in plan.get("steps", []))
+    if action_type == "click":
+        return f"click at ({plan.get('x', 0)},{plan.get('y', 0)})"
+    if action_type == "type_text":
+        return f"type {plan.get('text', '')!r}"
+    if action_type == "key":
+        return f"key {plan.get('key', '')}"
+    return action_type
+
+
+async def agent_loop(stats: Dict[str, int]) -> None:
+    """
+    Run the listen → transcribe → plan → execute cycle forever.
+    
+    Once recording ends, speech transcription and screen capture run
+    concurrently on worker threads, so the cycle only waits for the slower
+    of the two.
+    
+    Args:
+        stats: Counters for the session ("interactions")
+    """
+    # Pre-formatted lines for the actions shown in the prompt, and the prompt
+    # section rendered from them (re-rendered only when an action is recorded)
+    prompt_lines: Deque[str] = deque(maxlen=HISTORY_SIZE)
+    history_context = ""
+    
+    while True:
+        log.info("\n[agent] speak a command...")
+        
+        # 1. Listen to voice until silence
+        audio_samples = await record_command()
+        
+        # Skip if no audio captured
+        if len(audio_samples) == 0:
+            log.info("[agent] no audio captured, retrying...")
+            continue
+        
+        # 2. Convert speech to text while capturing the current screen state
+        user_text, (screenshot_img, screen_size) = await asyncio.gather(
+            asyncio.to_thread(transcribe_audio, audio_samples),
+            asyncio.to_thread(capture_screen)
+        )
+        if not user_text:
+            log.info("[agent] could not understand speech, retrying.")
+            continue
+        log.info("[agent] understood command: %s", user_text)
+        
+        # 3. Skip if screenshot failed
+        if screenshot_img is None:
+            log.warning("[agent] failed to capture screen, retrying...")
+            continue
+        
+        # 4. Plan the next UI action
+        plan = await propose_action_async(
+            user_request=user_text,
+            screenshot=screenshot_img,
+            screen_size=screen_size,
+            audio_samples=audio_samples,
+            history_context=history_context
+        )
+        
+        # 5. Check if we have an actionable plan
+        if plan.get("action_type") == "none":
+            log.info("[agent] no actionable plan. waiting for next command.")
+            continue
+        
+        # 6. Execute the planned action
+        log.info("[agent] executing plan: %s", plan)
+        execute_action_plan(plan)
+        
+        # 7. Save interaction to history as a short summary, not the full plan
+        plan_summary = summarize_plan(plan)
+        prompt_lines.append(format_history_line(user_text, plan_summary))
+        history_context = render_history(prompt_lines)
+        stats["interactions"] += 1
+        
+        # 8. Brief pause to prevent immediate re-triggering
+        await asyncio.sleep(0.5)
+
 
 def main():
     """
@@ -34,80 +140,25 @@ def main():
     Continuously listens for voice commands and executes UI actions
     based on AI planning until interrupted by Ctrl+C.
     """
-    # Initialize interaction history
-    history: List[Dict] = []
+    stats = {"interactions": 0}
     
     # Startup banner
-    print("=" * 60)
-    print("[agent] voice-controlled desktop agent online")
-    print("[agent] Press Ctrl+C to quit")
-    print("=" * 60)
+    log.info("=" * 60)
+    log.info("[agent] voice-controlled desktop agent online")
+    log.info("[agent] Press Ctrl+C to quit")
+    log.info("=" * 60)
     
     try:
-        while True:
-            print("\n[agent] speak a command...")
-            
-            # 1. Listen to voice until silence
-            audio_samples = record_command()
-            
-            # Skip if no audio captured
-            if len(audio_samples) == 0:
-                print("[agent] no audio captured, retrying...")
-                continue
-            
-            # 2. Convert speech to text
-            user_text = transcribe_audio(audio_samples)
-            if not user_text:
-                print("[agent] could not understand speech, retrying.")
-                continue
-            print(f"[agent] understood command: {user_text}")
-            
-            # 3. Capture current screen state
-            png_bytes, screen_size = capture_screen()
-            
-            # Skip if screenshot failed
-            if len(png_bytes) == 0:
-                print("[agent] failed to capture screen, retrying...")
-                continue
-            
-            # 4. Plan the next UI action
-            plan = propose_action(
-                user_request=user_text,
-                screenshot_png=png_bytes,
-                screen_size=screen_size,
-                history=history,
-                audio_samples=audio_samples
-            )
-            
-            # 5. Check if we have an actionable plan
-            if plan.get("action_type") == "none":
-                print("[agent] no actionable plan. waiting for next command.")
-                continue
-            
-            # 6. Execute the planned action
-            print(f"[agent] executing plan: {plan}")
-            execute_action_plan(plan)
-            
-            # 7. Save interaction to history
-            history.append({
-                "user_request": user_text,
-                "action_taken": plan
-            })
-            
-            # 8. Brief pause to prevent immediate re-triggering
-            time.sleep(0.5)
-            
-            # Show history length for debugging
-            print(f"[agent] history length: {len(history)}")
+        asyncio.run(agent_loop(stats))
     
     except KeyboardInterrupt:
-        print("\n[agent] shutting down...")
-        print(f"[agent] total interactions: {len(history)}")
-        print("[agent] goodbye!")
+        log.info("\n[agent] shutting down...")
+        log.info("[agent] total interactions: %d", stats['interactions'])
+        log.info("[agent] goodbye!")
     
     except Exception as e:
-        print(f"[agent] unexpected error: {e}")
-        print("[agent] restarting loop...")
+        log.error("[agent] unexpected error: %s", e)
+        log.error("[agent] restarting loop...")
         # Could add retry logic here if needed
 
 
@@ -2,56 +2,81 @@
 Screen capture module for full-screen screenshots.
 
 This module provides functionality to capture the primary monitor's screen
-and return it as PNG bytes in memory for processing by the AI planner.
+and return it as an in-memory PIL image for processing by the AI planner.
+The image is not encoded here; the planner downscales and encodes it once
+for upload.
 """
 
-import io
-from PIL import ImageGrab
-from typing import Tuple
+import logging
+import threading
+import mss
+import PIL.Image
+from typing import Optional, Tuple
 
+log = logging.getLogger(__name__)
 
-def capture_screen() -> Tuple[bytes, Tuple[int, int]]:
+# mss handles are not thread-safe and capture runs on worker threads,
+# so each thread keeps its own reusable handle
+_local = threading.local()
+
+
+def _get_sct() -> mss.base.MSSBase:
+    """
+    Return this thread's mss screenshot handle, creating it on first use.
+    
+    Returns:
+        mss.base.MSSBase: Screenshot handle for the current thread
+    """
+    sct = getattr(_local, "sct", None)
+    if sct is None:
+        sct = _local.sct = mss.mss()
+    return sct
+
+
+def capture_screen() -> Tuple[Optional[PIL.Image.Image], Tuple[int, int]]:
     """
     Capture a full-screen screenshot of the primary monitor.
     
     Returns:
-        Tuple[bytes, Tuple[int, int]]: PNG bytes and (width, height) dimensions
+        Tuple[Optional[PIL.Image.Image], Tuple[int, int]]: Screenshot image
+            (None on failure) and (width, height) dimensions
     """
     try:
-        # Capture the full screen using PIL
-        screenshot = ImageGrab.grab()
+        # Capture the primary monitor with mss (BGRA pixels)
+        sct = _get_sct()
+        raw = sct.grab(sct.monitors[1])
         
         # Get dimensions
-        width, height = screenshot.size
+        width, height = raw.size
         
-        # Convert to PNG bytes in memory
-        png_buffer = io.BytesIO()
-        screenshot.save(png_buffer, format='PNG')
-        png_bytes = png_buffer.getvalue()
+        # Wrap as an RGB PIL image; BGRX -> RGB is a single C-level conversion
+        screenshot = PIL.Image.frombytes("RGB", raw.size, raw.bgra, "raw", "BGRX")
         
         # Log the capture
-        print(f"[screen] captured {width}x{height}")
+        log.info("[screen] captured %dx%d", width, height)
         
-        return png_bytes, (width, height)
+        return screenshot, (width, height)
         
     except Exception as e:
-        print(f"[error] Screen capture failed: {e}")
-        # Return empty bytes and zero dimensions on failure
-        return b'', (0, 0)
+        log.error("[error] Screen capture failed: %s", e)
+        # Return no image and zero dimensions on failure
+        return None, (0, 0)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Test the screen capture
     print("Testing screen capture...")
     
     try:
-        png_data, dimensions = capture_screen()
+        image, dimensions = capture_screen()
         width, height = dimensions
         
         print(f"Captured screenshot: {width}x{height}")
-        print(f"PNG data size: {len(png_data)} bytes")
         
-        if len(png_data) > 0:
+        if image is not None:
+            print(f"Image mode: {image.mode}")
             print("✓ Screen capture successful!")
         else:
             print("✗ Screen capture failed - no data returned")
@@ -1,18 +1,35 @@
 """
-Local speech-to-text module using OpenAI Whisper.
+Local speech-to-text module using faster-whisper.
 
-This module provides local speech transcription using the Whisper "small" model.
+This module provides local speech transcription using the Whisper "small" model,
+run through CTranslate2 (faster-whisper) with int8 quantization on the CPU.
 Currently uses Whisper for offline transcription, but may be swapped out for
 Gemini audio models in the future for better integration with the AI planner.
 """
 
+import logging
+import os
+import threading
 import numpy as np
-import whisper
+from faster_whisper import WhisperModel
 
-# Load Whisper model once at module import
-print("[whisper] Loading Whisper 'small' model...")
-model = whisper.load_model("small")
-print("[whisper] Model loaded successfully")
+log = logging.getLogger(__name__)
+
+# Whisper model, loaded in a background thread started at import so startup
+# (and the first recording) is not blocked on it
+_model = None
+
+
+def _load_model() -> None:
+    """Load the Whisper model into the module-level _model."""
+    global _model
+    log.info("[whisper] Loading Whisper 'small' model...")
+    _model = WhisperModel("small", device="cpu", compute_type="int8", cpu_threads=os.cpu_count() or 0)
+    log.info("[whisper] Model loaded successfully")
+
+
+_load_thread = threading.Thread(target=_load_model, daemon=True)
+_load_thread.start()
 
 
 def transcribe_audio(audio_samples: np.ndarray) -> str:
@@ -26,31 +43,39 @@ def transcribe_audio(audio_samples: np.ndarray) -> str:
         str: Lowercase transcribed text, or empty string if transcription fails
     """
     try:
+        # Wait for the background load only if it has not finished yet
+        _load_thread.join()
+        if _model is None:
+            raise RuntimeError("Whisper model failed to load")
+        
         # Ensure audio is float32, 16 kHz mono
         if audio_samples.dtype != np.float32:
             audio_samples = audio_samples.astype(np.float32)
         
-        # Transcribe using Whisper
-        result = model.transcribe(
+        # Transcribe using Whisper (greedy decoding; VAD trims leading/trailing silence)
+        segments, _info = _model.transcribe(
             audio_samples,
-            fp16=False,
-            language="en"
+            language="en",
+            beam_size=1,
+            vad_filter=True
         )
         
         # Extract text and clean it up
-        text = result["text"].lower().strip()
+        text = "".join(segment.text for segment in segments).lower().strip()
         
         # Log the transcription
-        print(f"[voice] transcribed: {text}")
+        log.info("[voice] transcribed: %s", text)
         
         return text
         
     except Exception as e:
-        print(f"[error] Transcription failed: {e}")
+        log.error("[error] Transcription failed: %s", e)
         return ""
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Test the transcription with a simple example
     print("Testing speech-to-text module...")
     